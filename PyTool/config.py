@@ -2,12 +2,51 @@
 配置文件模块
 """
 
+import copy
+import functools
 import yaml
+from contextlib import nullcontext
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict, Optional
 import threading
 from filelock import FileLock
 
+try:
+    import numpy as np
+except ImportError:  # numpy为可选依赖
+    np = None
+
+# 优先使用libyaml的C实现，不可用时回退到纯Python实现
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+@functools.lru_cache(maxsize=512)
+def _split_key(key: str) -> tuple:
+    """
+    拆分以"."分隔的嵌套配置项路径，结果被缓存以避免重复拆分
+    """
+    return tuple(key.split("."))
+
+
+def _xor_bytes(data: bytes, key: bytes) -> bytes:
+    """
+    将数据与循环展开的密钥逐字节异或
+
+    参数:
+        data: 原始字节
+        key: 密钥字节
+    """
+    n = len(data)
+    key_b = (key * (n // len(key) + 1))[:n]
+    if np is not None:
+        data_arr = np.frombuffer(data, dtype=np.uint8)
+        key_arr = np.frombuffer(key_b, dtype=np.uint8)
+        return np.bitwise_xor(data_arr, key_arr).tobytes()
+    # 无numpy时使用大整数异或，由C实现按机器字处理
+    return (int.from_bytes(data, "big") ^ int.from_bytes(key_b, "big")).to_bytes(n, "big")
+
 
 class Cfg:
     """
@@ -22,28 +61,51 @@ class Cfg:
     """
     __defalut_key = "defalut_key"
 
+    # 进程级解析缓存: (绝对路径, mtime_ns, 文件大小) -> 解析结果，LRU淘汰
+    _parse_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+    _parse_cache_lock = threading.Lock()
+    _parse_cache_size = 128
     
-    def __init__(self, cfg_path: str):
+    def __init__(self, cfg_path: str, use_file_lock: bool = True):
         """
         初始化配置管理器
         
         参数:
             cfg_path: 配置文件路径
+            use_file_lock: 是否使用文件锁保证跨进程安全，配置文件仅在
+                单个进程内使用时可关闭以省去文件锁开销
         """
         self.__cfg_path = Path(cfg_path)
         self.__t_lock = threading.Lock()
-        self.__p_lock = FileLock(f"{self.__cfg_path.absolute()}.lock")
+        self.__p_lock = FileLock(f"{self.__cfg_path.absolute()}.lock") if use_file_lock else nullcontext()
         self.__cache = {}
 
     def load(self)->bool:
         """
         加载配置文件
+
+        文件未变化(mtime和大小均相同)时直接复用已解析的结果，跳过YAML解析
         """
         with self.__p_lock, self.__t_lock:
             if not self.__cfg_path.exists():
                 return False
-            with open(self.__cfg_path, "r", encoding="utf-8") as f:
-                self.__cache = yaml.safe_load(f, Loader=yaml.FullLoader)
+            st = self.__cfg_path.stat()
+            key = (str(self.__cfg_path.resolve()), st.st_mtime_ns, st.st_size)
+            cls = type(self)
+            with cls._parse_cache_lock:
+                cached = cls._parse_cache.get(key)
+                if cached is not None:
+                    cls._parse_cache.move_to_end(key)
+            if cached is None:
+                with open(self.__cfg_path, "r", encoding="utf-8") as f:
+                    # 空文件解析结果为None，按空配置处理
+                    cached = yaml.load(f, Loader=_Loader) or {}
+                with cls._parse_cache_lock:
+                    cls._parse_cache[key] = cached
+                    if len(cls._parse_cache) > cls._parse_cache_size:
+                        cls._parse_cache.popitem(last=False)
+            # 返回副本，避免set()修改污染缓存
+            self.__cache = copy.deepcopy(cached)
             return True
         
     def save(self)->bool:
@@ -52,14 +114,31 @@ class Cfg:
         """
         with self.__p_lock, self.__t_lock:
             with open(self.__cfg_path, "w", encoding="utf-8") as f:
-                yaml.dump(self.__cache, f, allow_unicode=True)
+                yaml.dump(self.__cache, f, Dumper=_Dumper, allow_unicode=True)
             return True
         
     def get(self, key: str)->Any:
         """
         获取配置项
-        """
-        return self.__cache.get(key)
+
+        支持以"."分隔的嵌套路径，如"database.host"；与路径完全相同的
+        顶层配置项优先
+        """
+        node = self.__cache.get(key)
+        if node is not None:
+            return node
+        # 非字符串键(如整数)不支持路径写法
+        if not isinstance(key, str):
+            return None
+        segs = _split_key(key)
+        if len(segs) == 1:
+            return None
+        node = self.__cache
+        for seg in segs:
+            if not isinstance(node, dict):
+                return None
+            node = node.get(seg)
+        return node
     
     def set(self, key: str, value: Any)->bool:
         """
@@ -72,7 +151,7 @@ class Cfg:
         """
         析构函数
         """
-        if self.__p_lock.is_locked: 
+        if getattr(self.__p_lock, "is_locked", False):
             self.__p_lock.release()
         if self.__t_lock.locked():
             self.__t_lock.release()
@@ -91,13 +170,7 @@ class Cfg:
         """
         if not data:
             return data
-        encrypted = []
-        key_len = len(key)
-        for i, c in enumerate(data):
-            key_c = key[i % key_len]
-            encrypted_c = chr(ord(c) ^ ord(key_c))
-            encrypted.append(encrypted_c)
-        return ''.join(encrypted).encode('utf-8').hex()
+        return _xor_bytes(data.encode('utf-8'), key.encode('utf-8')).hex()
 
     def decrypt(self, encrypted_hex: str, key: str = __defalut_key) -> str:
         """
@@ -116,14 +189,8 @@ class Cfg:
         if not encrypted_hex:
             return encrypted_hex
         try:
-            encrypted = bytes.fromhex(encrypted_hex).decode('utf-8')
-            decrypted = []
-            key_len = len(key)
-            for i, c in enumerate(encrypted):
-                key_c = key[i % key_len]
-                decrypted_c = chr(ord(c) ^ ord(key_c))
-                decrypted.append(decrypted_c)
-            return ''.join(decrypted)
+            encrypted = bytes.fromhex(encrypted_hex)
+            return _xor_bytes(encrypted, key.encode('utf-8')).decode('utf-8')
         except ValueError as e:
             raise ValueError("无效的hex字符串") from e
 
@@ -5,8 +5,10 @@ import datetime
 import os
 import sys
 
-import pydumpling
-from logger import Logger
+try:
+    from .logger import Logger
+except ImportError:  # 将PyTool目录直接加入sys.path使用时
+    from logger import Logger
 
 
 class Dumper:
@@ -39,6 +41,9 @@ class Dumper:
         @param exc_traceback: 异常回溯
         """
         try:
+            # pydumpling仅在发生异常时才需要，延迟导入以加快模块加载
+            import pydumpling
+
             # 生成dump文件
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             dump_file = os.path.join(self.__dump_dir, f"{self.__app_name}_{timestamp}.dump")
@@ -85,4 +90,5 @@ class Dumper:
 
         @param dump_file: dump文件路径
         """
+        import pydumpling
         return pydumpling.debug_dumpling(dump_file=dump_file)
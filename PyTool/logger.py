@@ -1,16 +1,79 @@
 """
 日志系统
 """
+import atexit
+import copy
 import datetime
 import logging
+import logging.handlers
+import multiprocessing.util
 import os
+import queue
+import threading
+
+# 日志格式
+_FORMATTER = logging.Formatter(
+    fmt='[%(asctime)s]'  # 时间
+        '[%(filename)s]'  # 文件名
+        '[%(process)d]'  # 进程ID
+        '[%(thread)d]'  # 线程ID
+        '[%(name)s]'  # 日志名
+        '[%(funcName)s]'  # 函数名
+        '[%(lineno)d]'  # 行号
+        '[%(levelname)s]'  # 日志级别
+        '%(message)s',  # 日志信息
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+class _RouteQueueHandler(logging.handlers.QueueHandler):
+    """
+    将日志记录放入队列，并标记接收该记录的logger，供_RouteHandler分发
+
+    子logger的记录会传播到父logger，按record.name分发会把同一条记录
+    重复写入子logger的文件，因此按实际接收记录的处理器分发
+    """
+
+    def __init__(self, queue, route: str):
+        super().__init__(queue)
+        self.route = route
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 传播时多个处理器共享同一条记录，需复制后再标记
+        record = super().prepare(copy.copy(record))
+        record.route = self.route
+        return record
+
+
+class _RouteHandler(logging.Handler):
+    """
+    按接收记录的logger将日志记录分发到对应的文件处理器
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.routes = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        handler = self.routes.get(record.route)
+        if handler is not None:
+            handler.handle(record)
 
 
 class Logger:
     """
     日志管理器类
+
+    各logger只挂载QueueHandler，日志记录进入队列后立即返回；
+    格式化和文件/控制台写入由单个后台QueueListener线程完成。
     """
     __logger_store = {}
+    __lock = threading.Lock()
+    __queue = queue.SimpleQueue()
+    __route_handler = _RouteHandler()
+    __listener = None
+    __log_day = None  # 当前日志目录对应的日期
+    __log_dir = None  # 当前日志目录
 
     @classmethod
     def get_logger(
@@ -21,15 +84,24 @@ class Logger:
         获取或创建一个logger实例
         """
         # 如果logger已存在，直接返回缓存的实例
-        if logger_name in cls.__logger_store:
-            return cls.__logger_store[logger_name]
+        logger = cls.__logger_store.get(logger_name)
+        if logger is not None:
+            return logger
+
+        with cls.__lock:
+            # 加锁后再次检查，避免并发时重复创建处理器
+            logger = cls.__logger_store.get(logger_name)
+            if logger is not None:
+                return logger
+            return cls.__create_logger(logger_name)
 
-        # 创建日志目录结构：./日志/年-月-日/logger_name.log
-        today: str = datetime.datetime.now().strftime("%Y-%m-%d")
-        father_dir: str = cls.__get_father_directory()
-        father_dir += r"\{}\{}".format("日志", today)
-        cls.__create_directory(father_dir)
-        logger_path = father_dir + r"\{}.log".format(logger_name)
+    @classmethod
+    def __create_logger(cls, logger_name: str) -> logging.Logger:
+        """
+        创建并缓存logger实例，调用方需持有__lock
+        """
+        # 日志目录结构：./日志/年-月-日/logger_name.log
+        logger_path = os.path.join(cls.__get_log_dir(), f"{logger_name}.log")
 
         # 配置文件日志处理器
         file_handler = logging.FileHandler(
@@ -40,38 +112,72 @@ class Logger:
         )
         file_handler.setLevel(logging.DEBUG)
 
-        # 配置控制台日志处理器
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.DEBUG)
-
-        # 配置日志格式
-        file_formatter = logging.Formatter(
-            fmt='[%(asctime)s]'  # 时间
-                '[%(filename)s]'  # 文件名
-                '[%(process)d]'  # 进程ID
-                '[%(thread)d]'  # 线程ID
-                '[%(name)s]'  # 日志名
-                '[%(funcName)s]'  # 函数名
-                '[%(lineno)d]'  # 行号
-                '[%(levelname)s]'  # 日志级别
-                '%(message)s',  # 日志信息
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-
-        # 应用格式化器
-        file_handler.setFormatter(file_formatter)
-        stream_handler.setFormatter(file_formatter)
+        file_handler.setFormatter(_FORMATTER)
+        cls.__route_handler.routes[logger_name] = file_handler
+        cls.__start_listener()
 
-        # 创建并配置logger
+        # 创建并配置logger，只挂载队列处理器
         new_logger = logging.getLogger(logger_name)
         new_logger.setLevel(logging.DEBUG)
-        new_logger.addHandler(file_handler)
-        new_logger.addHandler(stream_handler)
+        new_logger.addHandler(_RouteQueueHandler(cls.__queue, logger_name))
 
         # 缓存并返回logger实例
         cls.__logger_store[logger_name] = new_logger
         return new_logger
 
+    @classmethod
+    def __start_listener(cls) -> None:
+        """
+        启动后台日志监听线程（如果尚未启动），调用方需持有__lock
+        """
+        if cls.__listener is not None:
+            return
+        # 配置控制台日志处理器，所有logger共用
+        stream_handler = logging.StreamHandler()
+        stream_handler.setLevel(logging.DEBUG)
+        stream_handler.setFormatter(_FORMATTER)
+        cls.__listener = logging.handlers.QueueListener(cls.__queue, cls.__route_handler, stream_handler)
+        cls.__listener.start()
+
+    @classmethod
+    def _stop_listener(cls) -> None:
+        """
+        停止后台日志监听线程，写完队列中剩余的日志
+        """
+        with cls.__lock:
+            if cls.__listener is not None:
+                cls.__listener.stop()
+                cls.__listener = None
+
+    @classmethod
+    def _after_fork(cls) -> None:
+        """
+        fork后在子进程中重建队列和监听线程（父进程的线程不会被fork）
+        """
+        cls.__lock = threading.Lock()
+        cls.__queue = queue.SimpleQueue()
+        for logger in cls.__logger_store.values():
+            for handler in logger.handlers:
+                if isinstance(handler, logging.handlers.QueueHandler):
+                    handler.queue = cls.__queue
+        cls.__listener = None
+        if cls.__logger_store:
+            cls.__start_listener()
+
+    @classmethod
+    def __get_log_dir(cls) -> str:
+        """
+        获取当天的日志目录，目录路径按日期缓存，跨天时重新生成并创建
+
+        @return: 日志目录的绝对路径
+        """
+        day = datetime.date.today()
+        if day != cls.__log_day:
+            log_dir = os.path.join(cls.__get_father_directory(), "日志", day.strftime("%Y-%m-%d"))
+            cls.__create_directory(log_dir)
+            cls.__log_dir, cls.__log_day = log_dir, day
+        return cls.__log_dir
+
     @staticmethod
     def __get_father_directory(abspath = None) -> str:
         """
@@ -92,5 +198,22 @@ class Logger:
 
         @param dir_path: 要创建的目录路径
         """
-        if not os.path.exists(dir_path):
-            os.makedirs(dir_path)
+        os.makedirs(dir_path, exist_ok=True)
+
+
+def _register_stop(logger_cls) -> None:
+    """
+    注册进程退出时停止日志监听线程的回调
+
+    multiprocessing子进程通过os._exit退出，不会执行atexit回调，
+    只会在Process._bootstrap中执行multiprocessing的终结器
+    """
+    multiprocessing.util.Finalize(None, logger_cls._stop_listener, exitpriority=-100)
+
+
+atexit.register(Logger._stop_listener)
+_register_stop(Logger)
+# fork出的子进程启动时会清空继承的终结器，需重新注册
+multiprocessing.util.register_after_fork(Logger, _register_stop)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=Logger._after_fork)
@@ -4,26 +4,54 @@
 import zmq
 import json
 import threading
-import queue
 import os
 import datetime
-from concurrent.futures import ThreadPoolExecutor
+import itertools
+import time
+from collections import deque
 from typing import Any, Callable, Optional,Dict
 from logger import *
 
+try:
+    import orjson
+
+    # datetime和dataclass交给default处理，保证与标准库json的输出一致
+    _ORJSON_OPTION = (orjson.OPT_NON_STR_KEYS
+                      | orjson.OPT_PASSTHROUGH_DATETIME
+                      | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+    def _dumps(obj: Any, default: Optional[Callable] = None) -> bytes:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTION)
+
+    _loads = orjson.loads
+except ImportError:  # orjson为可选依赖，未安装时回退到标准库json
+    def _dumps(obj: Any, default: Optional[Callable] = None) -> bytes:
+        return json.dumps(obj, default=default).encode('utf-8')
+
+    _loads = json.loads
+
+# 单次批量发送的最大消息数
+MAX_BATCH = 64
+
+# 进程内管道地址序号，保证共享上下文中的inproc地址唯一
+_pipe_seq = itertools.count()
+
+
 class Pair:
     """
     基于ZMQ PAIR-PAIR模式的进程间通信类
     
     提供异步的双向通信功能，支持消息的发送和接收。
-    使用线程池处理消息的发送和接收，支持超时和重试机制。
+    使用独立的发送/接收线程处理消息，支持超时和重试机制。
     
     属性:
         __context (zmq.Context): ZMQ上下文
         __socket (zmq.Socket): ZMQ套接字
-        __thread_pool (ThreadPoolExecutor): 线程池
+        __recv_thread (threading.Thread): 接收线程
+        __send_thread (threading.Thread): 发送线程
         __stop_event (Event): 停止状态事件
-        __msg_queue (queue.Queue): 消息队列
+        __pipe_in (zmq.Socket): 进程内管道读端，由发送线程独占
+        __pipe_out (zmq.Socket): 进程内管道写端，由send()加锁写入
         __logger (logging.Logger): 日志记录器
     """
 
@@ -31,7 +59,8 @@ class Pair:
                  name: str = "Pair", 
                  address: str = None, 
                  is_server: bool = False,
-                 logger: Optional[logging.Logger] = None):
+                 logger: Optional[logging.Logger] = None,
+                 context: Optional[zmq.Context] = None):
         """
         初始化ZMQ PAIR通信实例
         
@@ -40,14 +69,26 @@ class Pair:
             address (str): 绑定/连接地址，服务端默认为"tcp://localhost:5555"，客户端默认为"tcp://localhost:5555"
             is_server (bool): 是否为服务端，True表示服务端，False表示客户端
             logger (logging.Logger): 日志记录器
+            context (zmq.Context): ZMQ上下文，默认使用进程内共享的全局上下文
         """
         self.__receive_callback = None
-        self.__context = zmq.Context()
+        self.__context = context if context is not None else zmq.Context.instance()
         self.__socket = self.__context.socket(zmq.PAIR)
-        self.__thread_pool = ThreadPoolExecutor(max_workers=2)
+        self.__recv_thread = None
+        self.__send_thread = None
         self.__stop_event = threading.Event()
         self.__stop_event.set()
-        self.__msg_queue = queue.Queue()
+        # 进程内管道，发送线程通过Poller阻塞等待，无消息时不会被唤醒
+        pipe_addr = f"inproc://pair-send-{next(_pipe_seq)}"
+        self.__pipe_in = self.__context.socket(zmq.PAIR)
+        self.__pipe_in.setsockopt(zmq.RCVHWM, 0)
+        self.__pipe_in.setsockopt(zmq.LINGER, 0)
+        self.__pipe_in.bind(pipe_addr)
+        self.__pipe_out = self.__context.socket(zmq.PAIR)
+        self.__pipe_out.setsockopt(zmq.SNDHWM, 0)
+        self.__pipe_out.setsockopt(zmq.LINGER, 0)
+        self.__pipe_out.connect(pipe_addr)
+        self.__pipe_lock = threading.Lock()
         self.__logger = Logger.get_logger(f"{name}_{os.getpid()}") if logger is None else logger
 
         # 根据是否为服务端进行绑定或连接
@@ -73,21 +114,28 @@ class Pair:
             return
 
         self.__stop_event.clear()
-        self.__thread_pool.submit(self.__receive_loop)
-        self.__thread_pool.submit(self.__send_loop)
+        self.__recv_thread = threading.Thread(target=self.__receive_loop, daemon=True)
+        self.__send_thread = threading.Thread(target=self.__send_loop, daemon=True)
+        self.__recv_thread.start()
+        self.__send_thread.start()
         self.__logger.info("通信服务已启动")
 
     def stop(self) -> None:
         """
         停止通信服务
         
-        关闭套接字和线程池。
+        等待收发线程退出后关闭套接字。
         """
         self.__stop_event.set()
+        # 发送空帧唤醒阻塞在Poller上的发送线程
+        self.__pipe_push(b"")
+        for t in (self.__recv_thread, self.__send_thread):
+            if t is not None and t.is_alive():
+                t.join(timeout=1.0)
         if self.__socket:
             self.__socket.close()
-        self.__thread_pool.shutdown(wait=True)
-        self.__context.term()
+        self.__pipe_in.close()
+        self.__pipe_out.close()
         self.__logger.info("通信服务已停止")
 
     def send(self, data: Any, timeout: float = 1.0) -> bool:
@@ -102,11 +150,34 @@ class Pair:
             bool: 发送是否成功
         """
         try:
-            self.__msg_queue.put(data, timeout=timeout)
-            return True
-        except queue.Full:
+            message = _dumps(data)
+        except Exception as e:
+            self.__logger.error(f"序列化发送数据失败: {e}")
+            return False
+        if not self.__pipe_push(message, timeout):
             self.__logger.error("发送队列已满")
             return False
+        return True
+
+    def __pipe_push(self, message: bytes, timeout: float = 0) -> bool:
+        """
+        将已序列化的消息写入进程内管道
+        
+        参数:
+            message (bytes): 序列化后的消息，空帧表示停止信号
+            timeout (float): 超时时间（秒）
+            
+        返回:
+            bool: 写入是否成功
+        """
+        with self.__pipe_lock:
+            try:
+                if self.__pipe_out.poll(int(timeout * 1000), zmq.POLLOUT):
+                    self.__pipe_out.send(message, flags=zmq.NOBLOCK)
+                    return True
+            except zmq.ZMQError:
+                pass
+            return False
 
     def receive(self, callback: Callable[[Any], None]) -> None:
         """
@@ -133,43 +204,103 @@ class Pair:
         """
         发送循环
         
-        从消息队列中获取数据并发送。
-        """
+        通过Poller同时等待进程内管道和发送套接字，仅在有消息或
+        套接字重新可写时唤醒。唤醒后取出管道中已就绪的全部消息，
+        每MAX_BATCH条合并为一个多帧消息发送。发送缓冲区满时消息暂存
+        在本地队列，待套接字可写后按原顺序重试同一批消息。
+        """
+        pending = deque()
+        poller = zmq.Poller()
+        poller.register(self.__pipe_in, zmq.POLLIN)
+        wait_writable = False
         while not self.__stop_event.is_set():
             try:
-                data = self.__msg_queue.get(timeout=0.1)
-                try:
-                    message = json.dumps(data).encode('utf-8')
-                    self.__socket.send(message, flags=zmq.NOBLOCK)
-                    self.__logger.debug(f"发送数据: {data}")
-                except zmq.ZMQError as e:
-                    if e.errno == zmq.EAGAIN:
-                        # 发送缓冲区已满，重新放入队列
-                        self.__msg_queue.put(data)
-                    else:
-                        self.__logger.error(f"发送数据失败: {e}")
-            except queue.Empty:
-                continue
+                events = dict(poller.poll())
+                if self.__pipe_in in events and not self.__drain_pipe(pending):
+                    break
+                self.__send_pending(pending)
+                # 仅在有积压消息时关注套接字可写事件
+                if pending and not wait_writable:
+                    poller.register(self.__socket, zmq.POLLOUT)
+                    wait_writable = True
+                elif not pending and wait_writable:
+                    poller.unregister(self.__socket)
+                    wait_writable = False
             except Exception as e:
                 self.__logger.error(f"发送循环异常: {e}")
 
+        # 停止前尽量发出已提交的消息，最多等待0.5秒
+        try:
+            self.__drain_pipe(pending)
+            deadline = time.monotonic() + 0.5
+            while pending and time.monotonic() < deadline:
+                if self.__socket.poll(50, zmq.POLLOUT):
+                    self.__send_pending(pending)
+            if pending:
+                self.__logger.warning(f"停止时丢弃未发送消息: {len(pending)}条")
+        except Exception as e:
+            self.__logger.error(f"发送循环异常: {e}")
+
+    def __drain_pipe(self, pending: deque) -> bool:
+        """
+        取出进程内管道中已就绪的全部消息
+        
+        参数:
+            pending (deque): 待发送消息队列
+            
+        返回:
+            bool: 收到停止信号返回False，否则返回True
+        """
+        while self.__pipe_in.poll(0, zmq.POLLIN):
+            message = self.__pipe_in.recv()
+            if not message:
+                return False
+            pending.append(message)
+        return True
+
+    def __send_pending(self, pending: deque) -> None:
+        """
+        按顺序批量发送积压消息，发送缓冲区满时停止，剩余消息保留在队列头部
+        
+        参数:
+            pending (deque): 待发送消息队列
+        """
+        while pending:
+            batch = [pending[i] for i in range(min(len(pending), MAX_BATCH))]
+            try:
+                self.__socket.send_multipart(batch, flags=zmq.NOBLOCK, copy=False)
+            except zmq.ZMQError as e:
+                if e.errno == zmq.EAGAIN:
+                    # 发送缓冲区已满，等待套接字可写后重试同一批消息
+                    return
+                self.__logger.error(f"发送数据失败: {e}")
+            else:
+                if self.__logger.isEnabledFor(logging.DEBUG):
+                    # 记录反序列化后的数据，与接收端日志保持一致
+                    for message in batch:
+                        self.__logger.debug("发送数据: %s", _loads(message))
+            for _ in batch:
+                pending.popleft()
+
     def __receive_loop(self) -> None:
         """
         接收循环
         
-        接收数据并调用回调函数处理。
+        接收数据并调用回调函数处理，一个多帧消息中的每一帧为一条数据。
         """
         while not self.__stop_event.is_set():
             try:
                 if self.__socket.poll(100, zmq.POLLIN):
-                    message = self.__socket.recv(flags=zmq.NOBLOCK)
-                    try:
-                        data = json.loads(message.decode('utf-8'))
-                        self.__logger.debug(f"接收数据: {data}")
-                        if self.__receive_callback:
-                            self.__receive_callback(data)
-                    except json.JSONDecodeError as e:
-                        self.__logger.error(f"解析接收数据失败: {e}")
+                    frames = self.__socket.recv_multipart(flags=zmq.NOBLOCK)
+                    for message in frames:
+                        try:
+                            data = _loads(message)
+                            if self.__logger.isEnabledFor(logging.DEBUG):
+                                self.__logger.debug("接收数据: %s", data)
+                            if self.__receive_callback:
+                                self.__receive_callback(data)
+                        except json.JSONDecodeError as e:
+                            self.__logger.error(f"解析接收数据失败: {e}")
             except zmq.ZMQError as e:
                 if e.errno != zmq.EAGAIN:
                     self.__logger.error(f"接收数据失败: {e}")
@@ -185,7 +316,8 @@ class Publisher:
     def __init__(self, 
                  pub_name: str, 
                  port: int = 5556, 
-                 bind_address: str = "localhost"):
+                 bind_address: str = "localhost",
+                 context: Optional[zmq.Context] = None):
         """
         初始化ZMQ发布者
         
@@ -193,14 +325,18 @@ class Publisher:
             pub_name: 发布者名称，用于日志记录和标识
             port: 发布端口，默认为5556
             bind_address: 绑定地址，默认为"localhost"表示所有网络接口
+            context: ZMQ上下文，默认使用进程内共享的全局上下文
         """
         self.__port = port  # 发布端口
         self.__bind_address = bind_address  # 绑定地址
-        self.__context = zmq.Context()  # 创建ZMQ上下文
+        self.__context = context if context is not None else zmq.Context.instance()  # ZMQ上下文
         self.__socket = self.__context.socket(zmq.PUB)  # 创建发布者套接字
         self.__running = False  # 发布者运行状态标志
         self.__pub_name = pub_name  # 发布者名称
         self._logger = Logger.get_logger(f"{pub_name}_{os.getpid()}")  # 获取带进程ID的日志记录器
+        self.__topic_cache: Dict[str, bytes] = {}  # 主题编码缓存
+        self.__last_ts_bucket = -1  # 上次生成时间戳所在的毫秒
+        self.__last_ts = ""  # 上次生成的ISO格式时间戳
 
     def start(self) -> bool:
         """
@@ -235,7 +371,6 @@ class Publisher:
         try:
             self.__running = False
             self.__socket.close()
-            self.__context.term()
             return True
         except Exception as e:
             self._logger.error(f"停止ZMQ发布者[{self.__pub_name}]失败", exc_info=e)
@@ -256,16 +391,21 @@ class Publisher:
             return False
 
         try:
-            # 添加时间戳
-            message.update({
-                "pub_time": datetime.datetime.now().isoformat(),
-            })
+            # 添加时间戳，同一毫秒内复用已格式化的字符串
+            ts_bucket = time.time_ns() // 1_000_000
+            if ts_bucket != self.__last_ts_bucket:
+                self.__last_ts = datetime.datetime.now().isoformat()
+                self.__last_ts_bucket = ts_bucket
+            message["pub_time"] = self.__last_ts
 
             # 序列化消息 
-            message_str = json.dumps(message, default=str)
+            payload = _dumps(message, default=str)
 
-            # 发送消息
-            self.__socket.send_string(f"{topic} {message_str}")
+            # 主题和消息体分帧发送，避免拼接缓冲区
+            topic_b = self.__topic_cache.get(topic)
+            if topic_b is None:
+                topic_b = self.__topic_cache.setdefault(topic, topic.encode('utf-8'))
+            self.__socket.send_multipart([topic_b, payload], copy=False)
             return True
 
         except Exception as e:
@@ -283,7 +423,8 @@ class Subscriber:
                  sub_name: str,
                  port: int = 5556,
                  host: str = "localhost",
-                 topics=None):
+                 topics=None,
+                 context: Optional[zmq.Context] = None):
         """
         初始化ZMQ订阅者
         
@@ -292,6 +433,7 @@ class Subscriber:
             port: 订阅端口，默认为5556
             host: 发布者主机地址，默认为localhost
             topics: 订阅的主题列表，None或空列表表示订阅所有主题
+            context: ZMQ上下文，默认使用进程内共享的全局上下文
         """
         if topics is None:
             topics = [""]
@@ -300,7 +442,7 @@ class Subscriber:
         self.__topics = topics
 
         # ZMQ上下文和套接字
-        self.__context = zmq.Context()
+        self.__context = context if context is not None else zmq.Context.instance()
         self.__socket = self.__context.socket(zmq.SUB)
 
         self.__sub_name = sub_name
@@ -359,9 +501,8 @@ class Subscriber:
             if self.__subscriber_thread and self.__subscriber_thread.is_alive():
                 self.__subscriber_thread.join(timeout=2.0)
 
-            # 关闭套接字和上下文
+            # 关闭套接字，共享上下文不在此终止
             self.__socket.close()
-            self.__context.term()
 
             return True
         except Exception as e:
@@ -375,19 +516,18 @@ class Subscriber:
                 # 设置接收超时，以便能够正常退出线程
                 if self.__socket.poll(timeout=100) != 0:
                     # 接收消息
-                    message = self.__socket.recv_string()
+                    parts = self.__socket.recv_multipart()
 
-                    # 解析主题和消息内容
-                    parts = message.split(" ", 1)
+                    # 第一帧为主题，第二帧为消息内容
                     if len(parts) == 2:
-                        topic, message_str = parts
+                        topic, payload = parts
 
                         try:
                             # 解析JSON消息
-                            message_data = json.loads(message_str)
+                            message_data = _loads(payload)
 
                             # 处理消息
-                            self._on_message(topic, message_data)
+                            self._on_message(topic.decode('utf-8'), message_data)
 
                         except json.JSONDecodeError as e:
                             self._logger.error(f"ZMQ订阅者[{self.__sub_name}]解析消息失败", exc_info=e)
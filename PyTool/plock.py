@@ -3,6 +3,8 @@
 """
 
 import multiprocessing
+import threading
+import time
 from collections import OrderedDict
 import os
 from filelock import FileLock
@@ -11,21 +13,41 @@ class KeyPLock:
     """
     进程锁管理器类，用于管理基于虚拟地址的进程锁
     使用filelock实现跨进程文件锁
+
+    锁对象缓存(_cache)为进程内私有，每个进程各自维护；
+    跨进程互斥由文件锁本身保证，_lock只需保护本进程内的缓存字典
     """
-    def __init__(self, lock_dir="./pylocks"):
+    def __init__(self, lock_dir="./pylocks", maxsize=4096):
         """
         初始化进程锁管理器
         
         @param lock_dir: 文件锁存储目录，默认为./pylocks
+        @param maxsize: 缓存的锁对象数量上限，超出时淘汰最久未使用且没有使用者的锁
         """
 
         # 创建锁目录(如果不存在)
         os.makedirs(lock_dir, exist_ok=True)
         self.lock_dir = lock_dir
+        self.maxsize = maxsize
         
-        # 用于保护_cache操作的进程互斥锁
-        self._lock = multiprocessing.Lock()
-        # 使用有序字典存储锁对象，key为虚拟地址
+        # 用于保护_cache操作的线程互斥锁
+        self._lock = threading.Lock()
+        # 使用有序字典存储锁条目[文件锁, 使用者数量]，key为虚拟地址
+        self._cache = OrderedDict()
+
+    def __getstate__(self):
+        """
+        序列化时只保留锁目录，锁对象在目标进程中重新创建
+        """
+        return {"lock_dir": self.lock_dir, "maxsize": self.maxsize}
+
+    def __setstate__(self, state):
+        """
+        反序列化时重建线程锁和空的锁缓存
+        """
+        self.lock_dir = state["lock_dir"]
+        self.maxsize = state["maxsize"]
+        self._lock = threading.Lock()
         self._cache = OrderedDict()
 
     def __del__(self):
@@ -34,16 +56,46 @@ class KeyPLock:
         """
         self._clear()
 
-    def _add(self, key):
+    def _acquire_entry(self, key):
         """
-        为指定key添加一个新的文件锁
+        获取指定key的锁条目并登记一个使用者，不存在时创建，并标记为最近使用
         
         @param key: 虚拟地址作为唯一标识
+        @return: 锁条目[文件锁, 使用者数量]
         """
         with self._lock:
-            if key not in self._cache:
+            entry = self._cache.get(key)
+            if entry is None:
                 lock_file = f"{self.lock_dir}/{key}.lock"
-                self._cache[key] = FileLock(lock_file)
+                entry = self._cache[key] = [FileLock(lock_file), 0]
+            else:
+                self._cache.move_to_end(key)
+            # 先登记使用者，淘汰时不会选中刚创建的条目
+            entry[1] += 1
+            if len(self._cache) > self.maxsize:
+                self._evict()
+            return entry
+
+    def _release_entry(self, entry):
+        """
+        注销锁条目的一个使用者
+
+        @param entry: _acquire_entry返回的锁条目
+        """
+        with self._lock:
+            entry[1] -= 1
+
+    def _evict(self):
+        """
+        淘汰最久未使用且没有使用者的文件锁，调用方需持有_lock
+
+        FileLock.is_locked只反映当前线程的状态，不能用来判断锁是否空闲，
+        因此按使用者数量判断；锁文件不会被删除，其他进程可能正在使用同一个锁文件
+        """
+        for key, entry in self._cache.items():
+            if entry[1] == 0:
+                del self._cache[key]
+                return
 
     def _del(self, key):
         """
@@ -63,17 +115,19 @@ class KeyPLock:
 
     class _LockContext:
         """
-        内部文件锁上下文管理器类
+        内部文件锁上下文管理器类，进入时登记使用者，退出时注销
         """
-        def __init__(self, lock):
-            self._lock = lock
+        def __init__(self, owner, key):
+            self._owner = owner
+            self._key = key
+            self._entry = None
         def __enter__(self):
-            self._lock.acquire()
-            print(f"进程 {multiprocessing.current_process().name} 获取锁")
+            self._entry = self._owner._acquire_entry(self._key)
+            self._entry[0].acquire()
             return self
         def __exit__(self, exc_type, exc_val, exc_tb):
-            self._lock.release()
-            print(f"进程 {multiprocessing.current_process().name} 释放锁")
+            self._entry[0].release()
+            self._owner._release_entry(self._entry)
 
     def lock(self, key):
         """
@@ -82,10 +136,8 @@ class KeyPLock:
         @param key: 虚拟地址作为唯一标识
         @return: 文件锁对象的上下文管理器，可用于with语句
         """
-        self._add(key)
-        return self._LockContext(self._cache[key])
-import time
-import multiprocessing
+        return self._LockContext(self, key)
+
 
 
 def worker(key, value, plock, shared_data):
@@ -94,11 +146,11 @@ def worker(key, value, plock, shared_data):
     @param key: 锁的虚拟地址
     @param value: 要添加到共享数据的值
     @param plock: KeyPLock实例
-    @param shared_data: 共享数据列表
+    @param shared_data: 结果队列(multiprocessing.Queue)
     """
     with plock.lock(key):
         # 临界区开始
-        shared_data.append(value)
+        shared_data.put_nowait(value)
         print(f"进程 {multiprocessing.current_process().name} 添加了 {value}")
         time.sleep(0.1)
         # 临界区结束
@@ -108,17 +160,19 @@ if __name__ == "__main__":
     KeyPLock 使用示例：多进程环境下对同一资源加锁
     """
     plock = KeyPLock()
-    manager = multiprocessing.Manager()
-    shared_data = manager.list()
+    # 使用队列收集结果，避免Manager代理对象每次操作都经过服务进程的开销
+    shared_data = multiprocessing.Queue()
     processes = []
     for i in range(10):
         p = multiprocessing.Process(target=worker, args=("resource1", i, plock, shared_data), name=f"P{i}")
         processes.append(p)
         p.start()
 
+    # 先取出全部结果再join，避免子进程因队列未被消费而无法退出
+    result = [shared_data.get() for _ in processes]
     for p in processes:
         p.join()
 
-    print("最终共享数据:", list(shared_data))
+    print("最终共享数据:", result)
 
 
@@ -5,6 +5,8 @@
 from typing import Any,Callable
 import threading
 import multiprocessing
+import multiprocessing.connection
+import socket
 from enum import Enum
 
 class TaskStatus(Enum):
@@ -21,12 +23,20 @@ class TaskPro(object):
     支持优雅停止和强制终止两种停止方式。
     """
     
-    def __init__(self):
+    def __init__(self, mp_context=None):
         """
         初始化任务进程管理器
         
         创建必要的事件对象和监控线程，为任务管理做准备。
+
+        @param mp_context: 进程启动方式，可为"fork"、"spawn"、"forkserver"或
+                           multiprocessing上下文对象，None表示使用平台默认方式
         """
+        # 进程上下文
+        if mp_context is None or isinstance(mp_context, str):
+            mp_context = multiprocessing.get_context(mp_context)
+        self._ctx = mp_context                               # 进程上下文，决定子进程启动方式
+
         # 任务基本信息
         self._task = None                                    # 任务函数
         self._name = None                                    # 任务名称
@@ -36,12 +46,13 @@ class TaskPro(object):
         self._status = None                                  # 任务状态
         
         # 进程控制事件
-        self._stop_event = multiprocessing.Event()          # 停止信号事件
-        self._start_success_event = multiprocessing.Event() # 启动成功确认事件
+        self._stop_event = self._ctx.Event()                # 停止信号事件
+        self._start_success_event = self._ctx.Event()       # 启动成功确认事件
         self._process = None                                 # 进程对象
 
         # 任务监控机制
-        self._update_event = multiprocessing.Event()        # 监控线程控制事件
+        self._update_stop = False                           # 监控线程退出标志
+        self._wake_r, self._wake_w = socket.socketpair()    # 自唤醒管道，通知监控线程进程对象已变化
         self._lock = threading.Lock()                       # 线程锁，保护共享资源访问
         self._update_worker = threading.Thread(target=self._update_job, daemon=True)  # 监控线程
         self._update_worker.start()                         # 启动监控线程
@@ -94,7 +105,7 @@ class TaskPro(object):
             process_kwargs['start_success_event'] = self._start_success_event  # 传递启动成功事件（覆盖可能存在的同名字段）
             
             # 创建新的进程对象，将控制事件传递给任务函数
-            self._process = multiprocessing.Process(
+            self._process = self._ctx.Process(
                 target=self._task,
                 args=self._args,
                 kwargs=process_kwargs,                       # 使用处理后的kwargs
@@ -103,11 +114,13 @@ class TaskPro(object):
             
             # 启动进程
             self._process.start()
+            self._wake()                                    # 通知监控线程等待新进程
             
         # 等待进程启动成功确认（使用传入的超时时间）
         if self._start_success_event.wait(timeout=timeout):
             with self._lock:
                 self._status = TaskStatus.RUNNING            # 启动成功，更新状态
+            self._wake()                                     # 进程可能已在确认前退出，通知监控线程复查
             return True
         else:
             # 启动超时，终止进程
@@ -155,14 +168,26 @@ class TaskPro(object):
             self._status = TaskStatus.STOPPED
             return True
 
+    def close(self) -> None:
+        """
+        停止监控线程并释放自唤醒管道
+        
+        监控线程持有本对象的引用，__del__在线程退出前不会被调用，
+        不再使用的任务需显式关闭，否则管道文件描述符会一直占用。
+        """
+        self._update_stop = True
+        self._wake()                                         # 唤醒监控线程使其退出
+        if self._update_worker is not threading.current_thread():
+            self._update_worker.join()                       # 等待监控线程关闭管道
+
     def is_alive(self) -> bool:
         """
         检查任务进程是否还在运行
         
         @return: 进程是否存活
         """
-        with self._lock:                                     # 获取线程锁，确保线程安全
-            return self._process is not None and self._process.is_alive()
+        process = self._process                              # 读取引用快照，无需加锁
+        return process is not None and process.is_alive()
 
     def get_status(self) -> TaskStatus:
         """
@@ -170,8 +195,7 @@ class TaskPro(object):
         
         @return: 当前任务状态
         """
-        with self._lock:                                     # 获取线程锁，确保线程安全
-            return self._status
+        return self._status                                  # 属性读取在GIL下是原子的，无需加锁
 
     def get_name(self) -> str:
         """
@@ -187,10 +211,10 @@ class TaskPro(object):
         
         @return: 进程ID，如果进程不存在返回None
         """
-        with self._lock:                                     # 获取线程锁，确保线程安全
-            if self._process and self._process.is_alive():
-                return self._process.pid
-            return None
+        process = self._process                              # 读取引用快照，无需加锁
+        if process and process.is_alive():
+            return process.pid
+        return None
 
     def restart(self) -> bool:
         """
@@ -215,15 +239,18 @@ class TaskPro(object):
         
         @return: 包含任务详细信息的字典
         """
-        with self._lock:                                     # 获取线程锁，确保线程安全
-            return {
-                'name': self._name,
-                'status': self._status.value if self._status else None,
-                'pid': self._process.pid if self._process and self._process.is_alive() else None,
-                'is_alive': self._process.is_alive() if self._process else False,
-                'args': self._args,
-                'kwargs': self._kwargs
-            }
+        # 读取字段快照，无需加锁，不会被耗时的stop()阻塞
+        process = self._process
+        status = self._status
+        is_alive = process.is_alive() if process else False
+        return {
+            'name': self._name,
+            'status': status.value if status else None,
+            'pid': process.pid if is_alive else None,
+            'is_alive': is_alive,
+            'args': self._args,
+            'kwargs': self._kwargs
+        }
 
     def __del__(self):
         """
@@ -237,36 +264,52 @@ class TaskPro(object):
                 self.stop()
             
             # 停止监控线程
-            if hasattr(self, '_update_event'):
-                self._update_event.set()                # 设置事件，通知监控线程退出
+            if hasattr(self, '_wake_w'):
+                self._update_stop = True
+                self._wake()                            # 唤醒监控线程使其退出
         except Exception:
             # 忽略析构时的异常，避免程序崩溃
             pass
 
+    def _wake(self) -> None:
+        """
+        唤醒监控线程，使其重新读取当前进程对象
+        """
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+
     def _update_job(self) -> None:
         """
         监控任务状态的后台线程函数
         
-        持续监控任务进程的状态变化，自动处理进程意外退出和结束信号。
-        该方法在单独的线程中运行，直到收到停止信号。
+        阻塞等待进程的sentinel或自唤醒管道，进程退出时立即更新状态，
+        无需周期性轮询。该方法在单独的线程中运行，直到收到停止信号。
         """
-        while not self._update_event.is_set():
+        exited = None                                        # 已退出的进程，不再等待其sentinel
+        while not self._update_stop:
             try:
                 with self._lock:                             # 获取线程锁，确保线程安全
-                    if self._process is not None:
-                        # 检查进程是否还在运行
-                        if not self._process.is_alive():
-                            if self._status == TaskStatus.RUNNING:
-                                # 进程意外结束，更新状态
-                                self._status = TaskStatus.STOPPED
-                                self._process = None
-                
-                # 等待一段时间再进行下次检查（1秒间隔）
-                self._update_event.wait(timeout=1.0)
-                
+                    process = self._process
+                    if process is not None and process is exited and self._status == TaskStatus.RUNNING:
+                        # 进程意外结束，更新状态
+                        self._status = TaskStatus.STOPPED
+                        self._process = process = None
+                waitables = [self._wake_r]
+                if process is not None and process is not exited:
+                    waitables.append(process.sentinel)
+
+                ready = multiprocessing.connection.wait(waitables)
+                if self._wake_r in ready:
+                    self._wake_r.recv(4096)                  # 清空唤醒数据
+                if process is not None and process.sentinel in ready:
+                    exited = process                         # 下一轮循环中更新状态
             except Exception:
                  # 忽略监控过程中的异常，确保监控线程不会崩溃
                  continue
+        self._wake_r.close()
+        self._wake_w.close()
 
 
 class TaskProMgr(object):
@@ -276,16 +319,22 @@ class TaskProMgr(object):
     用于管理多个TaskPro实例，提供集中化的任务管理功能。
     支持任务的创建、启动、停止、重启、移除等操作，以及批量管理功能。
     使用线程锁确保多线程环境下的安全性。
+
+    频繁启动任务时可指定mp_context="forkserver"(或支持时使用"fork")，
+    避免spawn方式下每个子进程重新导入整个程序带来的启动开销。
     """
     
-    def __init__(self):
+    def __init__(self, mp_context=None):
         """
         初始化进程管理器
         
         创建任务字典和线程锁，为多任务管理做准备。
+
+        @param mp_context: 所有任务使用的进程启动方式，参见TaskPro
         """
         self._tasks = {}                                     # 任务字典，存储任务名称到TaskPro实例的映射
         self._lock = threading.Lock()                        # 线程锁，确保多线程安全
+        self._mp_context = mp_context                        # 进程启动方式
     
     def create_task(self, name: str, task: Callable, args: tuple = None, kwargs: dict = None) -> bool:
         """
@@ -303,7 +352,7 @@ class TaskProMgr(object):
                 return False
             
             # 创建新的TaskPro实例
-            task_pro = TaskPro()
+            task_pro = TaskPro(self._mp_context)
             # 设置任务信息
             if task_pro.set(task, name, args, kwargs):
                 self._tasks[name] = task_pro                 # 添加到任务字典
@@ -318,6 +367,7 @@ class TaskProMgr(object):
         @param timeout: 等待启动成功确认的超时时间（秒），默认10秒
         @return: 启动是否成功
         """
+        # 启动需在管理器锁内完成，避免任务被并发移除后仍启动出不受管理的子进程
         with self._lock:                                     # 获取线程锁
             if name in self._tasks:
                 return self._tasks[name].start(timeout)      # 启动指定任务，传递超时参数
@@ -330,10 +380,11 @@ class TaskProMgr(object):
         @param name: 任务名称
         @return: 停止是否成功
         """
-        with self._lock:                                     # 获取线程锁
-            if name in self._tasks:
-                return self._tasks[name].stop()              # 优雅停止指定任务
+        with self._lock:                                     # 获取线程锁，只保护任务字典的读取
+            task = self._tasks.get(name)
+        if task is None:
             return False                                     # 任务不存在
+        return task.stop()                                   # 优雅停止指定任务
     
 
     
@@ -344,6 +395,7 @@ class TaskProMgr(object):
         @param name: 任务名称
         @return: 重启是否成功
         """
+        # 重启同样会启动子进程，需在管理器锁内完成
         with self._lock:                                     # 获取线程锁
             if name in self._tasks:
                 return self._tasks[name].restart()           # 重启指定任务
@@ -357,13 +409,14 @@ class TaskProMgr(object):
         @return: 移除是否成功
         """
         with self._lock:                                     # 获取线程锁
-            if name in self._tasks:
-                # 先停止任务进程
-                self._tasks[name].stop()
-                # 从任务字典中移除
-                del self._tasks[name]
-                return True
+            # 从任务字典中移除
+            task = self._tasks.pop(name, None)
+        if task is None:
             return False                                     # 任务不存在
+        # 在锁外停止任务进程并释放监控资源，避免阻塞其他操作
+        task.stop()
+        task.close()
+        return True
     
     def get_task_info(self, name: str) -> dict:
         """
@@ -372,10 +425,11 @@ class TaskProMgr(object):
         @param name: 任务名称
         @return: 任务信息字典
         """
-        with self._lock:                                     # 获取线程锁
-            if name in self._tasks:
-                return self._tasks[name].info()              # 返回任务详细信息
+        with self._lock:                                     # 获取线程锁，只保护任务字典的读取
+            task = self._tasks.get(name)
+        if task is None:
             return None                                      # 任务不存在
+        return task.info()                                   # 返回任务详细信息
     
     def list_tasks(self) -> list:
         """
@@ -392,12 +446,13 @@ class TaskProMgr(object):
         
         @return: 包含所有任务信息的字典
         """
-        with self._lock:                                     # 获取线程锁
-            result = {}
-            # 遍历所有任务，收集信息
-            for name, task in self._tasks.items():
-                result[name] = task.info()                   # 获取每个任务的详细信息
-            return result
+        with self._lock:                                     # 获取线程锁，只复制任务列表
+            items = list(self._tasks.items())
+        result = {}
+        # 在锁外遍历所有任务，收集信息
+        for name, task in items:
+            result[name] = task.info()                       # 获取每个任务的详细信息
+        return result
     
     def stop_all_tasks(self) -> bool:
         """
@@ -405,13 +460,14 @@ class TaskProMgr(object):
         
         @return: 操作是否成功
         """
-        with self._lock:                                     # 获取线程锁
-            success = True
-            # 遍历所有任务，逐个停止
-            for task in self._tasks.values():
-                if not task.stop():                          # 优雅停止任务
-                    success = False                          # 记录失败状态
-            return success
+        with self._lock:                                     # 获取线程锁，只复制任务列表
+            tasks = list(self._tasks.values())
+        success = True
+        # 在锁外逐个停止，单个任务停止最长需约6秒，不能阻塞其他操作
+        for task in tasks:
+            if not task.stop():                              # 优雅停止任务
+                success = False                              # 记录失败状态
+        return success
     
 
     
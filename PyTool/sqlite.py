@@ -2,12 +2,21 @@
 sqlite数据库访问模块
 """
 
+import os
+import re
 import sqlite3
 import threading
 from filelock import FileLock
 from pathlib import Path
 from contextlib import contextmanager
 
+# 判断SQL是否为写操作(需要进程锁)，无法识别的语句按读操作处理
+_WRITE_RE = re.compile(
+    r"^\s*(insert|update|delete|replace|create|drop|alter|begin|commit|end|rollback"
+    r"|savepoint|release|vacuum|reindex|analyze|attach|detach|pragma|with)\b",
+    re.I
+)
+
 class SqliteMgr:
     """
     SQLite数据库管理器类
@@ -15,24 +24,39 @@ class SqliteMgr:
     使用双重锁机制保证并发安全：
     - 线程锁(__t_lock): 保证同一进程内多线程安全
     - 进程锁(__p_lock): 通过文件锁保证跨进程安全
+    每个线程复用自己的数据库连接，避免每条SQL都重新打开连接
+
+    WAL模式下读操作可与写操作并发，默认只有写操作获取锁；
+    未持有文件锁的跨进程并发写入依赖SQLite自身的写锁和busy超时等待
     """
     
-    def __init__(self, db_path: str, optimize: bool = True):
+    def __init__(self, db_path: str, optimize: bool = True, use_file_lock="auto"):
         """
         初始化SQLite数据库管理器
         
         参数:
             db_path: 数据库文件路径(相对或绝对路径)
             optimize: 是否启用数据库优化配置(默认True)
+            use_file_lock: 进程锁使用方式
+                "auto": 仅写操作获取进程锁和线程锁，读操作不加锁(默认)
+                True: 所有操作都获取进程锁和线程锁
+                False: 不使用进程锁，写操作只获取线程锁
             
         属性:
             __t_lock: threading.Lock对象，用于线程同步
             __db_path: Path对象，数据库文件的绝对路径
             __p_lock: FileLock对象，用于进程间同步
+            __tls: threading.local对象，缓存每个线程的数据库连接
+            __cons: 本对象创建的连接及其所属进程和线程，用于统一关闭
         """
         self.__t_lock = threading.Lock()  # 线程锁 - 用于同一进程内的线程同步
         self.__db_path = str(Path(db_path).absolute())  # 转换为绝对路径
         self.__p_lock = FileLock(f"{self.__db_path}.lock")  # 进程锁 - 使用文件锁实现跨进程同步
+        self.__tls = threading.local()  # 线程本地连接缓存
+        self.__cons = []  # 已创建的连接列表，元素为(进程ID, 所属线程, 连接)
+        self.__cons_lock = threading.Lock()  # 保护__cons的锁
+        self.__use_file_lock = use_file_lock  # 进程锁使用方式
+        self.__optimize = optimize  # 是否对新连接应用优化配置
 
         # 数据库优化配置
         if optimize:
@@ -40,45 +64,121 @@ class SqliteMgr:
 
     def _get_con(self):
         """
-        获取数据库连接
+        获取当前线程的数据库连接
+
+        连接按线程缓存并复用；fork后的子进程不会复用父进程的连接
         """
-        return sqlite3.connect(
+        pid = os.getpid()
+        cached = getattr(self.__tls, "con", None)
+        if cached is not None and cached[0] == pid:
+            return cached[1]
+        conn = sqlite3.connect(
             self.__db_path,
-            check_same_thread=False,  # 不允许多线程使用同一个连接
-            isolation_level="EXCLUSIVE",     # 每个sql语句事务独立
+            check_same_thread=False,  # 允许在其他线程中统一关闭连接
+            isolation_level=None,    # 自动提交，批量操作显式使用BEGIN IMMEDIATE
             timeout=30.0,            # 连接超时时间
-            detect_types=sqlite3.PARSE_DECLTYPES  # 创建表时的类型
+            detect_types=sqlite3.PARSE_DECLTYPES,  # 创建表时的类型
+            cached_statements=512    # 预编译语句缓存，相同SQL文本复用执行计划
         )
+        if self.__optimize:
+            self._optimize_con(conn)
+        self.__tls.con = (pid, conn)
+        current = threading.current_thread()
+        with self.__cons_lock:
+            # 关闭本进程中所属线程已退出的连接，避免短生命周期线程的连接一直累积
+            alive = []
+            for con_pid, thread, con in self.__cons:
+                if con_pid == pid and not thread.is_alive():
+                    try:
+                        con.close()
+                    except Exception:
+                        pass
+                else:
+                    alive.append((con_pid, thread, con))
+            alive.append((pid, current, conn))
+            self.__cons = alive
+        return conn
+
+    @contextmanager
+    def _lock(self, write: bool = True):
+        """
+        获取执行SQL所需的锁
+
+        参数:
+            write: 是否为写操作
+        """
+        if self.__use_file_lock is True or (write and self.__use_file_lock == "auto"):
+            with self.__p_lock, self.__t_lock:
+                yield
+        elif write:
+            with self.__t_lock:
+                yield
+        else:
+            yield
+
+    def close(self):
+        """
+        关闭本进程中由该管理器创建的全部数据库连接
+        """
+        pid = os.getpid()
+        with self.__cons_lock:
+            cons, self.__cons = self.__cons, []
+        for con_pid, _, conn in cons:
+            if con_pid == pid:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        self.__tls = threading.local()
 
     def _optimize(self):
         """
-        数据库优化配置
+        数据库优化配置(持久化到数据库文件的参数)
         设置以下优化参数:
+        - 页面大小: 设置为操作系统页大小的倍数，只对尚未建表的空库生效，
+          已有数据的库需执行VACUUM(且不能处于WAL模式)才能修改
         - WAL日志模式: 提高并发性能
-        - 同步模式: 设置为NORMAL以平衡性能和数据安全
-        - 缓存大小: 增大缓存提高性能
-        - 临时存储: 使用内存临时表提高速度
-        - 页面大小: 设置为操作系统页大小的倍数
-        - 自动清理: 启用自动清理WAL文件
+        连接级参数见_optimize_con
         """
         with self.__p_lock, self.__t_lock:
             # 使用无事务隔离级别的连接进行优化设置
             conn = sqlite3.connect(str(self.__db_path), isolation_level=None)
             cursor = conn.cursor()
+            # 设置页面大小为4096(操作系统页大小的倍数)，必须在切换WAL和建表之前
+            cursor.execute("PRAGMA page_size=4096")
             # 设置WAL日志模式(提高并发性能)
             cursor.execute("PRAGMA journal_mode=WAL")
-            # 设置同步模式为NORMAL(平衡性能和数据安全)
-            cursor.execute("PRAGMA synchronous=NORMAL") 
-            # 增大缓存大小(默认2000页)
-            cursor.execute("PRAGMA cache_size=-10000")  
-            # 使用内存临时表(提高临时表操作速度)
-            cursor.execute("PRAGMA temp_store=MEMORY")
-            # 设置页面大小为4096(操作系统页大小的倍数)
-            cursor.execute("PRAGMA page_size=4096")
-            # 启用自动清理WAL文件
-            cursor.execute("PRAGMA wal_autocheckpoint=100")
             conn.close()
 
+    @staticmethod
+    def _optimize_con(conn):
+        """
+        连接级优化配置，这些参数只对当前连接生效，需在每个新连接上设置
+        设置以下优化参数:
+        - 同步模式: 设置为NORMAL以平衡性能和数据安全
+        - 缓存大小: 增大缓存提高性能
+        - 临时存储: 使用内存临时表提高速度
+        - 忙等待: 数据库被其他连接锁定时最多等待30秒
+        - 自动检查点: WAL达到1000页时自动合并，避免频繁检查点造成停顿
+        - 内存映射: 通过mmap直接读取页面，减少read系统调用和数据拷贝
+        - WAL大小上限: 检查点后将WAL文件截断到64MB以内
+        """
+        cursor = conn.cursor()
+        # 设置同步模式为NORMAL(平衡性能和数据安全)
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        # 增大缓存大小(默认2000页)
+        cursor.execute("PRAGMA cache_size=-10000")
+        # 使用内存临时表(提高临时表操作速度)
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        # 设置忙等待超时(毫秒)
+        cursor.execute("PRAGMA busy_timeout=30000")
+        # 设置WAL自动检查点页数
+        cursor.execute("PRAGMA wal_autocheckpoint=1000")
+        # 设置内存映射大小(256MB)
+        cursor.execute("PRAGMA mmap_size=268435456")
+        # 限制WAL文件大小(64MB)
+        cursor.execute("PRAGMA journal_size_limit=67108864")
+
     def __del__(self):
         """
         析构函数
@@ -86,6 +186,8 @@ class SqliteMgr:
         避免资源泄漏
         """
         try:
+            if hasattr(self, '_SqliteMgr__cons'):
+                self.close()
             if hasattr(self, '_SqliteMgr__p_lock') and self.__p_lock.is_locked:
                 self.__p_lock.release()
         except Exception:
@@ -104,31 +206,35 @@ class SqliteMgr:
             
         特性:
         1. 自动获取线程锁和进程锁
-        2. 自动提交事务(成功时)或回滚(失败时)
-        3. 自动关闭数据库连接
+        2. 以BEGIN IMMEDIATE开始事务，成功时COMMIT，失败时ROLLBACK
+        3. 复用当前线程的数据库连接
         4. 异常会自动向上抛出
+
+        批量写入应放在同一个事务中，整批数据只需一次提交
         """
-        with self.__p_lock, self.__t_lock:
-            conn = None
+        with self._lock():
+            conn = self._get_con()
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
             try:
-                conn = self._get_con()
-                cursor = conn.cursor()
                 yield cursor  # 将游标交给上下文使用
-                conn.commit()  # 执行成功则提交事务
-            except Exception as e:
-                if conn:
-                    conn.rollback()  # 执行失败则回滚事务
+                cursor.execute("COMMIT")  # 执行成功则提交事务
+            except BaseException as e:
+                # KeyboardInterrupt等也需回滚，否则线程复用的连接会一直持有写锁
+                if conn.in_transaction:
+                    cursor.execute("ROLLBACK")  # 执行失败则回滚事务
                 raise e  # 重新抛出异常
-            finally:
-                if conn:
-                    conn.close()
 
-    def execute(self, sql: str):
+    def execute(self, sql: str, params=()):
         """
         执行SQL语句并返回结果
+
+        单条语句以自动提交方式执行；多条写操作请使用transaction或executemany
+        使用?占位符传参时SQL文本保持不变，可命中连接上的预编译语句缓存
         
         参数:
             sql: 要执行的SQL语句
+            params: SQL参数(序列或字典)，默认为空
             
         返回:
             查询结果列表(对于查询语句)
@@ -136,21 +242,63 @@ class SqliteMgr:
         异常:
             执行失败会抛出原生的sqlite3异常
         """
-        with self.__p_lock, self.__t_lock:
-            conn = None
+        with self._lock(_WRITE_RE.match(sql) is not None):
+            cursor = self._get_con().cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchall()  # 返回查询结果
+
+    def executemany(self, sql: str, params_iter) -> int:
+        """
+        使用同一条SQL批量执行多组参数
+
+        整批数据只获取一次锁并在一个事务中提交，适合批量插入
+
+        参数:
+            sql: 带?占位符的SQL语句
+            params_iter: 参数序列的可迭代对象
+
+        返回:
+            受影响的行数
+
+        异常:
+            执行失败会回滚整批数据并抛出原生的sqlite3异常
+        """
+        with self._lock():
+            conn = self._get_con()
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
             try:
-                conn = self._get_con()
-                cursor = conn.cursor()
-                cursor.execute(sql)
-                conn.commit()
-                return cursor.fetchall()  # 返回查询结果
-            except Exception as e:
-                if conn:
-                    conn.rollback()
+                cursor.executemany(sql, params_iter)
+                # COMMIT会重置游标的rowcount，需在提交前取出
+                rowcount = cursor.rowcount
+                cursor.execute("COMMIT")
+                return rowcount
+            except BaseException as e:
+                if conn.in_transaction:
+                    cursor.execute("ROLLBACK")
+                raise e
+
+    def executescript(self, script: str) -> None:
+        """
+        执行由多条SQL语句组成的脚本
+
+        整个脚本只获取一次锁；脚本中的语句逐条自动提交，
+        需要原子执行时可在脚本中自行使用BEGIN/COMMIT
+
+        参数:
+            script: 以分号分隔的SQL脚本
+
+        异常:
+            执行失败会回滚脚本中未提交的事务并抛出原生的sqlite3异常
+        """
+        with self._lock():
+            conn = self._get_con()
+            try:
+                conn.executescript(script)
+            except BaseException as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
                 raise e
-            finally:
-                if conn:
-                    conn.close()
 
 
 
@@ -163,9 +311,8 @@ def thread_task(db_path, name_prefix, start_idx, count):
     @param count: 插入数量
     """
     db = SqliteMgr(db_path)
-    for i in range(count):
-        sql = f"INSERT INTO user (name, age) VALUES ('{name_prefix}_{start_idx + i}', {20 + i % 10})"
-        db.execute(sql)
+    params = [(f"{name_prefix}_{start_idx + i}", 20 + i % 10) for i in range(count)]
+    db.executemany("INSERT INTO user (name, age) VALUES (?, ?)", params)
 
 def process_task(db_path, proc_idx, thread_num, insert_per_thread):
     """
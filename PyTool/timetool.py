@@ -2,6 +2,7 @@
 时间工具
 """
 import datetime
+import time
 
 def timer(func):
     """
@@ -16,15 +17,13 @@ def timer(func):
 
     def wrapper(*args, **kwargs):
         # 记录开始时间
-        start_time = datetime.datetime.now()
+        start_time = time.perf_counter_ns()
 
         # 执行函数
         result = func(*args, **kwargs)
 
-        # 计算运行时间
-        end_time = datetime.datetime.now()
-        run_time = end_time - start_time
-        run_time = run_time.total_seconds()
+        # 计算运行时间(秒)
+        run_time = (time.perf_counter_ns() - start_time) * 1e-9
 
         # 输出运行时间
         print(f"{func.__name__} : {run_time}s")
@@ -43,7 +42,7 @@ def now_date():
     返回:
         datetime.date: 当前日期对象
     """
-    return datetime.datetime.now().date()
+    return datetime.date.today()
 
 def now_time():
     """
@@ -10,10 +10,13 @@ class KeyTLock:
     在对象销毁时会自动清理所有锁资源
     """
     
-    def __init__(self):
+    def __init__(self, maxsize=4096):
         """
         初始化线程锁管理器
+
+        @param maxsize: 缓存的锁对象数量上限，超出时淘汰最早创建且未被持有的锁
         """
+        self.maxsize = maxsize
         # 用于保护_cache操作的互斥锁
         self._lock = threading.Lock()
         # 使用有序字典存储锁对象，key为虚拟地址
@@ -25,15 +28,33 @@ class KeyTLock:
         """
         self._clear()
 
-    def _add(self, key):
+    def _insert(self, key):
         """
-        为指定key添加一个新的线程锁
-        
+        获取指定key的线程锁，不存在时创建并按容量淘汰，只在缓存未命中时调用
+
         @param key: 唯一标识
+        @return: 线程锁对象
         """
         with self._lock:
-            if key not in self._cache:
-                self._cache[key] = threading.Lock()
+            lock = self._cache.get(key)
+            if lock is None:
+                lock = self._cache[key] = threading.Lock()
+                if len(self._cache) > self.maxsize:
+                    self._evict()
+            return lock
+
+    def _evict(self):
+        """
+        淘汰最早创建且未被持有的线程锁，调用方需持有_lock
+
+        已读取到锁但尚未持有的线程在获取锁后会发现条目已被替换并重试，
+        因此这里只需跳过已被持有的锁
+        """
+        newest = next(reversed(self._cache))
+        for key, lock in self._cache.items():
+            if key != newest and not lock.locked():
+                del self._cache[key]
+                return
 
     def _del(self, key):
         """
@@ -55,11 +76,23 @@ class KeyTLock:
         """
         内部锁上下文管理器类
         """
-        def __init__(self, lock):
-            self._lock = lock
+        def __init__(self, owner, key):
+            self._owner = owner
+            self._key = key
+            self._lock = None
         def __enter__(self):
-            self._lock.acquire()
-            return self
+            cache = self._owner._cache
+            while True:
+                # 快速路径：key已存在时直接读取，dict读取在GIL下是原子的，无需加锁
+                lock = cache.get(self._key)
+                if lock is None:
+                    lock = self._owner._insert(self._key)
+                lock.acquire()
+                # 读取后锁可能已被淘汰，持有后再确认仍是缓存中的锁，否则重试
+                if cache.get(self._key) is lock:
+                    self._lock = lock
+                    return self
+                lock.release()
         def __exit__(self, exc_type, exc_val, exc_tb):
             self._lock.release()
 
@@ -70,8 +103,7 @@ class KeyTLock:
         @param key: 唯一标识
         @return: 锁对象的上下文管理器，可用于with语句
         """
-        self._add(key)
-        return self._LockContext(self._cache[key])
+        return self._LockContext(self, key)
 
 
 
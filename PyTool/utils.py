@@ -6,6 +6,39 @@ import os
 import subprocess
 import re
 import platform
+import time
+
+_IS_WINDOWS = platform.system().lower() == 'windows'
+# ping输出中的平均延迟，Windows支持中英文系统
+_PING_WIN_RE = re.compile(r'(?:平均|Average) = (\d+)ms')
+_PING_UNIX_RE = re.compile(r'min/avg/max/mdev = [\d.]+/([\d.]+)/[\d.]+/[\d.]+ ms')
+
+# 进程名(小写) -> PID列表 的缓存及其生成时间
+_NAME_CACHE = {}
+_NAME_CACHE_TS = 0.0
+_NAME_CACHE_TTL = 0.5
+
+
+def _pids_by_name(name: str) -> list:
+    """
+    按进程名查找PID，遍历系统进程的结果缓存_NAME_CACHE_TTL秒
+    
+    参数:
+        name: 进程名称(不区分大小写)
+        
+    返回:
+        list: 匹配的PID列表，结果可能最多滞后_NAME_CACHE_TTL秒
+    """
+    global _NAME_CACHE, _NAME_CACHE_TS
+    now = time.monotonic()
+    if now - _NAME_CACHE_TS > _NAME_CACHE_TTL:
+        cache = {}
+        for proc in psutil.process_iter(['name']):
+            proc_name = proc.info['name']
+            if proc_name:
+                cache.setdefault(proc_name.lower(), []).append(proc.pid)
+        _NAME_CACHE, _NAME_CACHE_TS = cache, now
+    return _NAME_CACHE.get(name.lower(), [])
 
 def find_pro(name_or_pid)->bool:
     """
@@ -26,12 +59,7 @@ def find_pro(name_or_pid)->bool:
             
         # 如果传入的是进程名称
         elif isinstance(name_or_pid, str):
-            for proc in psutil.process_iter(['name']):
-                try:
-                    if proc.name().lower() == name_or_pid.lower():
-                        return True
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    pass
+            return bool(_pids_by_name(name_or_pid))
         return False
         
     except Exception as e:
@@ -48,6 +76,7 @@ def start_exe(exe_path: str, args: list = None) -> bool:
     返回:
         bool: 启动是否成功
     """
+    global _NAME_CACHE_TS
     try:
         if args is None:
             args = []
@@ -55,6 +84,8 @@ def start_exe(exe_path: str, args: list = None) -> bool:
         if not os.path.exists(exe_path):
             return False
         psutil.Popen([exe_path] + args, shell=True)
+        # 进程列表已变化，使进程名缓存失效
+        _NAME_CACHE_TS = 0.0
         return True
     except Exception as e:
         return False
@@ -83,16 +114,30 @@ def terminate_exe(name_or_pid) -> bool:
             
         # 如果传入的是进程名称
         elif isinstance(name_or_pid, str):
-            terminated = False
-            for proc in psutil.process_iter(['name', 'pid']):
+            global _NAME_CACHE_TS
+            name = name_or_pid.lower()
+            # 单次遍历系统进程收集目标，不使用缓存，避免终止已被复用的PID
+            targets = [
+                proc for proc in psutil.process_iter(['name'])
+                if proc.info['name'] and proc.info['name'].lower() == name and proc.pid != current_pid
+            ]
+            terminated = []
+            for proc in targets:
                 try:
-                    if proc.name().lower() == name_or_pid.lower():
-                        if proc.pid != current_pid:
-                            proc.terminate()
-                            terminated = True
+                    proc.terminate()
+                    terminated.append(proc)
                 except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                     pass
-            return terminated
+            # 并行等待所有进程退出，超时仍未退出的强制结束
+            gone, alive = psutil.wait_procs(terminated, timeout=3)
+            for proc in alive:
+                try:
+                    proc.kill()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            # 进程列表已变化，使进程名缓存失效
+            _NAME_CACHE_TS = 0.0
+            return bool(terminated)
             
     except Exception as e:
         return False
@@ -107,22 +152,21 @@ def ping(host = "www.baidu.com", count=4):
     """
     try:
         # Windows系统使用 '-n'，Linux/macOS使用 '-c'
-        param = '-n' if platform.system().lower() == 'windows' else '-c'
+        param = '-n' if _IS_WINDOWS else '-c'
         command = ['ping', param, str(count), host]
-        output = subprocess.check_output(command, stderr=subprocess.STDOUT, universal_newlines=True)
+        r = subprocess.run(command, capture_output=True, text=True, timeout=count * 2 + 5)
+        if r.returncode != 0:
+            return None
+        output = r.stdout
         
         # 解析输出获取平均延迟
-        if 'Windows' in platform.system():
-            # 支持中英文Windows系统
-            match = re.search(r'(?:平均|Average) = (\d+)ms', output) or re.search(r'Average = (\d+)ms', output)
-        else:
-            match = re.search(r'min/avg/max/mdev = [\d.]+/([\d.]+)/[\d.]+/[\d.]+ ms', output)
+        match = (_PING_WIN_RE if _IS_WINDOWS else _PING_UNIX_RE).search(output)
         
         if match:
             return float(match.group(1))
         else:
             return None
-    except subprocess.CalledProcessError:
+    except (subprocess.TimeoutExpired, OSError):
         return None
 
 